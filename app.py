@@ -1,16 +1,175 @@
 import streamlit as st
-import requests
-import json
+import asyncio
+import diskcache
+import hashlib
+import httpx
+import orjson
 import re
-from docx import Document
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-import plotly.graph_objs as go
-import pandas as pd
+from types import SimpleNamespace
+from zipfile import ZIP_DEFLATED, ZipFile
+import numpy as np
 
 # Set page configuration
 st.set_page_config(page_title="Entrepreneurship Feasibility Analysis", page_icon="🌎", layout="wide")
 
+MODEL = "mistralai/Mixtral-8x7B-Instruct-v0.1"
+SEARCH_CACHE_TTL = 3600  # Serper results for the same query are stable for an hour
+ANALYSIS_CACHE_TTL = 86400
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+SEMANTIC_THRESHOLD = 0.93  # Cosine similarity above which a prior analysis is reused
+SEMANTIC_MAX_ENTRIES = 1000  # Per analysis length; the oldest entries are evicted first
+SEMANTIC_CANDIDATES = 4  # Neighbours checked per lookup, in case the nearest has expired
+MAX_SNIPPETS = 5  # Search results sent to the model per sector
+SNIPPET_CHARS = 400
+SNIPPET_DEDUPE_CHARS = 80  # Snippets sharing this many leading characters count as duplicates
+ANALYSIS_LENGTHS = {"short": 1024, "standard": 2048, "long": 4096}  # max_tokens per preset
+JSON_TOKENS_PER_SECTOR = 200  # Reserved for each sector's entry in the trailing chart data block
+MIN_PROSE_TOKENS_PER_SECTOR = 150  # Below this a sector's analysis is not worth generating
+KEEPALIVE_EXPIRY = 120  # Seconds an idle pooled connection is kept open (httpx defaults to 5)
+
+# Types of industry, business, or service
+SECTORS = (
+    "Manufacturing Industry", "Retail Trade", "Tourism", "Information Technology",
+    "Agriculture", "Transport and Logistics", "Private Education", "Healthcare", "Restaurants and Cafes",
+    "Construction", "Financial Services", "Handicrafts", "Audiovisual Production", "Renewable Energy",
+    "Telecommunications", "Consulting Services", "Real Estate", "Fashion and Textiles"
+)
+CUSTOM_IDEA = "Describe your own entrepreneurship idea"
+
+# Batched analyses head each sector's section "## Sector <n>", a label the model can echo reliably
+SECTION_RE = re.compile(r'^#+\s*Sector\s+(\d+)\b.*$', re.MULTILINE)
+
+@st.cache_data
+def sector_options():
+    return SECTORS + (CUSTOM_IDEA,)
+
+SPACES_TO_UNDERSCORES = str.maketrans(' ', '_')
+
+@st.cache_data
+def docx_file_name(city, country):
+    return f"Feasibility_Analysis_{city.translate(SPACES_TO_UNDERSCORES)}_{country.translate(SPACES_TO_UNDERSCORES)}.docx"
+
+# Persistent response cache shared by every session
+@st.cache_resource
+def get_cache():
+    return diskcache.Cache("./.llm_cache")
+
+def cache_key(kind, **fields):
+    return hashlib.sha256(orjson.dumps({"kind": kind, **fields}, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+# Pooled HTTP/2 clients kept alive across reruns, so API calls reuse warm TLS connections.
+# The async client lives on its own long-running event loop, since an AsyncClient is bound
+# to the loop it is first used on.
+@st.cache_resource
+def get_http():
+    limits = httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=KEEPALIVE_EXPIRY)
+    return httpx.Client(http2=True, timeout=60, limits=limits)
+
+@st.cache_resource
+def get_event_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+@st.cache_resource
+def get_async_http():
+    limits = httpx.Limits(max_keepalive_connections=10, keepalive_expiry=KEEPALIVE_EXPIRY)
+    return httpx.AsyncClient(http2=True, timeout=60, limits=limits)
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+# Worker pool for CPU-bound post-processing that can overlap with rendering
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=2)
+
+async def warm_async(client, url):
+    try:
+        await client.head(url)
+    except httpx.HTTPError:
+        pass
+
+def warm(client, url):
+    try:
+        client.head(url)
+    except httpx.HTTPError:
+        pass
+
+# Open both API connections in the background at startup, so the first query skips the handshakes
+@st.cache_resource(show_spinner=False)
+def prewarm_connections():
+    threading.Thread(target=warm, args=(get_http(), "https://api.together.xyz/"), daemon=True).start()
+    asyncio.run_coroutine_threadsafe(warm_async(get_async_http(), "https://google.serper.dev/"), get_event_loop())
+
+prewarm_connections()
+
+# Semantic cache: near-duplicate requests reuse an analysis from the exact-match cache.
+# The heavy imports in this file are deferred until first use, since Streamlit reruns the
+# whole script on every widget interaction.
+@st.cache_resource
+def get_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+@st.cache_resource
+def get_semantic_index(max_tokens):
+    import faiss
+
+    # One index per analysis length, so a long request is never served a short answer.
+    # Rebuilt from the vectors persisted alongside the exact-match cache; vectors expire with
+    # their analyses, and entries whose analysis is gone are pruned here.
+    cache = get_cache()
+    keys, vectors = [], []
+    for key in cache.get(f"semantic:{max_tokens}:keys", []):
+        vector = cache.get(f"semantic:vector:{key}")
+        if vector is not None and key in cache:
+            keys.append(key)
+            vectors.append(vector)
+    keys, vectors = keys[-SEMANTIC_MAX_ENTRIES:], vectors[-SEMANTIC_MAX_ENTRIES:]
+    cache.set(f"semantic:{max_tokens}:keys", keys)
+
+    index = faiss.IndexFlatIP(EMBEDDING_DIM)
+    if vectors:
+        index.add(np.vstack(vectors))
+    return index, keys, threading.Lock()
+
+def embed_request(city, country, sector):
+    text = f"{city}|{country}|{sector}".lower().strip()
+    return get_embedder().encode([text], normalize_embeddings=True).astype("float32")
+
+def semantic_lookup(vector, max_tokens):
+    index, keys, lock = get_semantic_index(max_tokens)
+    with lock:
+        if index.ntotal == 0:
+            return None
+        scores, ids = index.search(vector, min(SEMANTIC_CANDIDATES, index.ntotal))
+        candidates = [keys[i] for score, i in zip(scores[0], ids[0]) if score > SEMANTIC_THRESHOLD]
+    # Skip neighbours whose analysis has expired since the index was built
+    for key in candidates:
+        cached = get_cache().get(key)
+        if cached is not None:
+            return cached
+    return None
+
+def semantic_store(vector, key, max_tokens):
+    index, keys, lock = get_semantic_index(max_tokens)
+    with lock:
+        index.add(vector)
+        keys.append(key)
+        overflow = len(keys) - SEMANTIC_MAX_ENTRIES
+        if overflow > 0:
+            index.remove_ids(np.arange(overflow, dtype=np.int64))
+            del keys[:overflow]
+        get_cache().set(f"semantic:vector:{key}", vector, expire=ANALYSIS_CACHE_TTL)
+        get_cache().set(f"semantic:{max_tokens}:keys", keys)
+
 # Function to create the information column
+@st.fragment
 def create_info_column():
     st.markdown("""
     ## About this application
@@ -48,70 +207,193 @@ with col2:
     TOGETHER_API_KEY = st.secrets.get("TOGETHER_API_KEY")
     SERPER_API_KEY = st.secrets.get("SERPER_API_KEY")
 
-    # Types of industry, business, or service
-    sectors = [
-        "Manufacturing Industry", "Retail Trade", "Tourism", "Information Technology", 
-        "Agriculture", "Transport and Logistics", "Private Education", "Healthcare", "Restaurants and Cafes",
-        "Construction", "Financial Services", "Handicrafts", "Audiovisual Production", "Renewable Energy", 
-        "Telecommunications", "Consulting Services", "Real Estate", "Fashion and Textiles"
-    ]
+    async def search_information(client, cache, query):
+        key = cache_key("search", query=query.lower().strip())
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
 
-    def search_information(query):
         url = "https://google.serper.dev/search"
-        payload = json.dumps({
+        payload = {
             "q": f"{query} city feasibility analysis statistics"
-        })
+        }
         headers = {
             'X-API-KEY': SERPER_API_KEY,
             'Content-Type': 'application/json'
         }
-        response = requests.post(url, headers=headers, data=payload)
-        return response.json()
-
-    def generate_feasibility_analysis(city, country, sector, context):
-        url = "https://api.together.xyz/inference"
-        payload = json.dumps({
-            "model": "mistralai/Mixtral-8x7B-Instruct-v0.1",
-            "prompt": f"Context: {context}\n\nCity: {city}\nCountry: {country}\nSector: {sector}\n\nProvide a detailed and extensive feasibility analysis on starting a business in the '{sector}' sector in {city}, {country}. The information should be accurate, complete, and based on real data. Include statistics, relevant numerical data, market analysis, entry barriers, and any additional information that may be of interest. Make sure to cover multiple aspects of business feasibility.\n\nWhere possible, include numerical data that can be used to create charts. For example, you could provide market size projections over the next 5 years, or a breakdown of market share by competitors.\n\nFeasibility analysis:",
-            "max_tokens": 4096,
+        response = await client.post(url, headers=headers, content=orjson.dumps(payload))
+        # Fail loudly on quota or rate limits rather than caching an error body as "no results"
+        response.raise_for_status()
+        results = orjson.loads(response.content)
+        cache.set(key, results, expire=SEARCH_CACHE_TTL)
+        return results
+
+    def generate_feasibility_analysis(city, country, sectors, contexts, max_tokens):
+        # All sectors share one prompt, so the shared context is sent and prefilled once.
+        # Yields the analysis as it is generated; cached analyses are yielded whole.
+        key = cache_key(
+            "analysis", model=MODEL, city=city.lower().strip(), country=country.lower().strip(),
+            sectors=[sector.lower().strip() for sector in sectors], contexts=contexts, max_tokens=max_tokens
+        )
+        cached = get_cache().get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        vector = embed_request(city, country, "; ".join(sectors))
+        cached = semantic_lookup(vector, max_tokens)
+        if cached is not None:
+            yield cached
+            return
+
+        url = "https://api.together.xyz/v1/chat/completions"
+        context = "\n\n".join(f"Context for {sector}:\n{context}" for sector, context in zip(sectors, contexts))
+        # Reserve each sector's chart data allowance first; the prose gets the rest, at a
+        # conservative 0.6 words per token
+        prose_words = (max_tokens - len(sectors) * JSON_TOKENS_PER_SECTOR) * 3 // 5
+        sector_list = "\n".join(f"Sector {number}: {sector}" for number, sector in enumerate(sectors, 1))
+        prompt = f"{context}\n\nCity: {city}\nCountry: {country}\n{sector_list}\n\nFor each of the sectors listed above, provide a detailed and extensive feasibility analysis on starting a business in that sector in {city}, {country}. Start each sector's analysis with a heading of the form '## Sector <n>: <sector name>', using the sector's number from the list above. The information should be accurate, complete, and based on real data. Include statistics, relevant numerical data, market analysis, entry barriers, and any additional information that may be of interest. Make sure to cover multiple aspects of business feasibility.\n\nWhere possible, include numerical data that can be used to create charts. For example, you could provide market size projections over the next 5 years, or a breakdown of market share by competitors.\n\nKeep the prose under about {prose_words} words in total, so the chart data still fits. Do not use code blocks anywhere in the prose. End your answer with a fenced ```json block holding that chart data, keyed by sector label: {{\"Sector <n>\": {{\"projections\": [{{\"year\": int, \"value\": float}}, ...], \"market_share\": [{{\"label\": str, \"pct\": float}}, ...]}}}}.\n\nFeasibility analysis:"
+        payload = {
+            "model": MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
             "temperature": 0.2,
             "top_p": 0.9,
             "top_k": 50,
             "repetition_penalty": 1.1,
-            "stop": ["City:"]
-        })
+            "stop": ["City:"],
+            "stream": True
+        }
         headers = {
             'Authorization': f'Bearer {TOGETHER_API_KEY}',
             'Content-Type': 'application/json'
         }
-        response = requests.post(url, headers=headers, data=payload)
-        return response.json()['output']['choices'][0]['text'].strip()
-
-    def extract_numerical_data(text):
-        # Extract data for line chart (e.g., market size projections)
-        line_data = re.findall(r'(\d{4}).*?(\d+(?:\.\d+)?)', text)
-        
-        # Extract data for pie chart (e.g., market share)
-        pie_data = re.findall(r'(\w+(?:\s+\w+)?)\s*:\s*(\d+(?:\.\d+)?)\s*%', text)
-        
-        return line_data, pie_data
+        received, fence = "", None
+        with get_http().stream("POST", url, headers=headers, content=orjson.dumps(payload)) as response:
+            # Errors arrive as a plain JSON body rather than as frames
+            response.raise_for_status()
+            # Server-sent events: one "data: {...}" frame per token, terminated by "data: [DONE]"
+            for line in response.iter_lines():
+                if not line.startswith("data: "):
+                    continue
+                frame = line[len("data: "):]
+                if frame == "[DONE]":
+                    break
+                event = orjson.loads(frame)
+                if "error" in event:
+                    raise RuntimeError(f"Together API error: {event['error']}")
+                token = event["choices"][0]["delta"].get("content")
+                if not token:
+                    continue
+                scan_from = max(len(received) - len("```json"), 0)
+                received += token
+                yield token
+                # Decoding dominates latency, so stop reading as soon as the chart data block
+                # closes; closing the response ends the generation
+                if fence is None:
+                    found = received.find("```json", scan_from)
+                    if found != -1:
+                        fence = found + len("```json")
+                elif received.find("```", max(fence, scan_from)) != -1:
+                    break
+
+        text = received.strip()
+        if not text:
+            # A successful status with no content frames, e.g. a plain JSON body
+            raise RuntimeError("Together API returned no analysis")
+        # Generation runs at a low temperature, so any complete analysis is worth replaying. One
+        # cut off before its chart data block closed is shown but not cached.
+        complete = fence is not None and received.find("```", fence) != -1
+        if complete:
+            get_cache().set(key, text, expire=ANALYSIS_CACHE_TTL)
+            semantic_store(vector, key, max_tokens)
+
+    def split_sections(text, sectors):
+        # Cut a batched analysis at each "## Sector <n>" heading. Unless every sector's heading
+        # is found, the text is kept whole rather than risk dropping part of it.
+        if len(sectors) == 1:
+            return {sectors[0]: text}
+        headings = {}
+        for match in SECTION_RE.finditer(text):
+            index = int(match.group(1)) - 1
+            if 0 <= index < len(sectors) and index not in headings:
+                headings[index] = match
+        if len(headings) < len(sectors):
+            return {", ".join(sectors): text}
+        found = sorted(headings.items(), key=lambda item: item[1].start())
+        sections = {}
+        for position, (index, match) in enumerate(found):
+            # Any preamble before the first heading stays with the first section
+            start = 0 if position == 0 else match.end()
+            end = found[position + 1][1].start() if position + 1 < len(found) else len(text)
+            section = text[start:end]
+            if position == 0:
+                section = section[:match.start()] + section[match.end():]
+            sections[sectors[index]] = section.strip()
+        return {sector: sections[sector] for sector in sectors}
+
+    async def search_sector(client, cache, city, country, sector):
+        search_results = await search_information(client, cache, f"{city} {country} {sector}")
+        # Keep the prompt short: the top results only, clipped, without repeated snippets
+        snippets, sources, seen = [], [], set()
+        for item in search_results.get("organic", ())[:MAX_SNIPPETS]:
+            snippet = item["snippet"][:SNIPPET_CHARS]
+            if snippet[:SNIPPET_DEDUPE_CHARS] in seen:
+                continue
+            seen.add(snippet[:SNIPPET_DEDUPE_CHARS])
+            snippets.append(snippet)
+            sources.append(item["link"])
+        return "\n".join(snippets), sources
+
+    async def search_all(client, cache, city, country, sectors):
+        return await asyncio.gather(*(search_sector(client, cache, city, country, sector) for sector in sectors))
+
+    def search_sectors(city, country, sectors):
+        # Every sector is searched concurrently on the shared event loop; the cached resources
+        # are resolved here, on the script thread
+        return run_async(search_all(get_async_http(), get_cache(), city, country, sectors))
+
+    @st.cache_data(ttl=3600, show_spinner=False)
+    def parse_chart_data(text, sectors):
+        # Split off the trailing ```json block of chart data and key it by the requested sectors
+        # instead of the "Sector <n>" labels the model uses
+        if "```json" not in text:
+            return text, {}
+        analysis, block = text.rsplit("```json", 1)
+        try:
+            chart_data = orjson.loads(block.split("```", 1)[0])
+        except orjson.JSONDecodeError:
+            chart_data = {}
+        if not isinstance(chart_data, dict):
+            chart_data = {}
+        if len(sectors) == 1 and len(chart_data) == 1:
+            return analysis.strip(), {sectors[0]: next(iter(chart_data.values()))}
+        labels = {f"Sector {number}": sector for number, sector in enumerate(sectors, 1)}
+        return analysis.strip(), {labels[label]: data for label, data in chart_data.items() if label in labels}
+
+    # Figures are shared rather than copied: st.cache_data would unpickle, and so re-validate,
+    # every figure on each hit, and st.plotly_chart only reads them
+    @st.cache_resource(max_entries=64, show_spinner=False)
+    def create_charts(chart_data):
+        import plotly.graph_objs as go
 
-    def create_charts(line_data, pie_data):
         charts = []
         
-        if line_data:
-            df = pd.DataFrame(line_data, columns=['Year', 'Value'])
-            df['Year'] = pd.to_numeric(df['Year'])
-            df['Value'] = pd.to_numeric(df['Value'])
-            df = df.sort_values('Year')
-            
-            fig = go.Figure(data=go.Scatter(x=df['Year'], y=df['Value'], mode='lines+markers'))
+        projections = chart_data.get("projections") or []
+        if projections:
+            years = np.fromiter((int(point["year"]) for point in projections), dtype=np.int32, count=len(projections))
+            values = np.fromiter((float(point["value"]) for point in projections), dtype=np.float64, count=len(projections))
+            order = np.argsort(years, kind='stable')
+            years, values = years[order], values[order]
+
+            fig = go.Figure(data=go.Scatter(x=years, y=values, mode='lines+markers'))
             fig.update_layout(title='Market Size Projection', xaxis_title='Year', yaxis_title='Market Size')
             charts.append(fig)
         
-        if pie_data:
-            labels = [item[0] for item in pie_data]
-            values = [float(item[1]) for item in pie_data]
+        market_share = chart_data.get("market_share") or []
+        if market_share:
+            labels = [str(item["label"]) for item in market_share]
+            values = np.fromiter((float(item["pct"]) for item in market_share), dtype=np.float64, count=len(market_share))
             
             fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
             fig.update_layout(title='Market Share')
@@ -119,7 +401,36 @@ with col2:
         
         return charts
 
-    def create_docx(city, country, information, sources):
+    def save_docx(doc, stream):
+        # Same package layout as Document.save, but deflated at level 1 instead of the default 6:
+        # faster to write for long analyses, at a slightly larger file size. This relies on
+        # python-docx internals (pinned in requirements.txt), so fall back to Document.save
+        # if they are missing; everything is resolved before the first byte is written.
+        try:
+            from docx.opc.pkgwriter import PackageWriter
+
+            package = doc.part.package
+            parts, rels = package.parts, package.rels
+            marshals = [part.before_marshal for part in parts]
+            write_steps = (
+                (PackageWriter._write_content_types_stream, parts),
+                (PackageWriter._write_pkg_rels, rels),
+                (PackageWriter._write_parts, parts),
+            )
+        except (ImportError, AttributeError):
+            doc.save(stream)
+            return
+
+        for before_marshal in marshals:
+            before_marshal()
+        with ZipFile(stream, "w", compression=ZIP_DEFLATED, compresslevel=1) as zipf:
+            writer = SimpleNamespace(write=lambda pack_uri, blob: zipf.writestr(pack_uri.membername, blob))
+            for write_step, items in write_steps:
+                write_step(writer, items)
+
+    def build_docx(city, country, information, sources):
+        from docx import Document
+
         doc = Document()
         doc.add_heading(f'Feasibility Analysis - {city}, {country}', 0)
 
@@ -136,64 +447,100 @@ with col2:
 
         doc.add_paragraph('\nNote: This document was generated by an AI assistant. Verify the information with official sources for more accurate and up-to-date data.')
 
-        return doc
+        buffer = BytesIO()
+        save_docx(doc, buffer)
+        return buffer.getvalue()
+
+    # Builds the document on the worker pool while the charts render. The shared future also
+    # memoizes the bytes, so fragment reruns do not rebuild and reserialize the document.
+    @st.cache_resource(max_entries=32, show_spinner=False)
+    def create_docx(city, country, information, sources):
+        return get_executor().submit(build_docx, city, country, information, sources)
+
+    # Charts and download run as a fragment, so clicking download does not rerun the whole app
+    @st.fragment
+    def render_results(city, country, information, chart_data, all_sources):
+        docx = create_docx(city, country, information, all_sources)
+
+        for sector in chart_data:
+            # Create charts from the structured data; malformed model output just means no charts
+            try:
+                charts = create_charts(chart_data.get(sector) or {})
+            except (AttributeError, KeyError, TypeError, ValueError):
+                charts = []
+
+            # Display charts, labelled by sector when several were analyzed
+            if charts and len(chart_data) > 1:
+                st.markdown(f"**{sector}**")
+            for chart in charts:
+                st.plotly_chart(chart)
+
+        st.write("---")
+
+        # A failed build must not stay cached for these inputs: drop it and build again
+        if docx.exception() is not None:
+            create_docx.clear()
+            docx = create_docx(city, country, information, all_sources)
+
+        # Button to download the document
+        st.download_button(
+            label="Download analysis as DOCX",
+            data=docx.result(),
+            file_name=docx_file_name(city, country),
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        )
 
     st.write("Enter a city and country:")
     city = st.text_input("City:")
     country = st.text_input("Country:")
 
-    st.write("Select an industry, business, or service sector, or describe your entrepreneurship idea:")
-    sector_options = sectors + ["Describe your own entrepreneurship idea"]
-    selected_sector = st.selectbox("Sector", sector_options)
+    st.write("Select one or more industry, business, or service sectors, or describe your entrepreneurship idea:")
+    selected_sectors = st.multiselect("Sectors", sector_options())
 
-    if selected_sector == "Describe your own entrepreneurship idea":
+    if CUSTOM_IDEA in selected_sectors:
         business_idea = st.text_area("Describe your entrepreneurship idea:")
         if not business_idea:
             st.warning("Please describe your entrepreneurship idea.")
             st.stop()
-        selected_sector = "Custom idea: " + business_idea  # Concatenate user idea into a separate sector
+        # Concatenate user idea into a separate sector
+        selected_sectors = [
+            "Custom idea: " + business_idea if sector == CUSTOM_IDEA else sector
+            for sector in selected_sectors
+        ]
+
+    # One canonical order for searching, "Sector <n>" numbering, cache keys and embeddings, so a
+    # cached answer's numbered sections and chart data always line up with the same sectors
+    selected_sectors = sorted(selected_sectors)
+
+    length = st.radio("Analysis length", tuple(ANALYSIS_LENGTHS), index=2, horizontal=True)
+    max_sectors = ANALYSIS_LENGTHS[length] // (JSON_TOKENS_PER_SECTOR + MIN_PROSE_TOKENS_PER_SECTOR)
 
     if st.button("Get feasibility analysis"):
-        if city and country and selected_sector:
+        if len(selected_sectors) > max_sectors:
+            st.warning(f"A {length} analysis fits at most {max_sectors} sectors. Please select fewer sectors or a longer analysis.")
+        elif city and country and selected_sectors:
             with st.spinner("Searching for information and generating feasibility analysis..."):
-                information, all_sources = {}, []
+                all_sources = []
 
-                # Search for relevant information
-                search_results = search_information(f"{city} {country} {selected_sector}")
-                context = "\n".join([item["snippet"] for item in search_results.get("organic", [])])
-                sources = [item["link"] for item in search_results.get("organic", [])]
+                # Search for relevant information, one concurrent search per sector
+                results = search_sectors(city, country, selected_sectors)
+                contexts = [context for context, _ in results]
+                for _, sources in results:
+                    all_sources.extend(sources)
 
-                # Generate feasibility analysis
-                data = generate_feasibility_analysis(city, country, selected_sector, context)
+                # Generate the feasibility analysis for every sector in one request, displaying it as it streams in
+                label = "sector" if len(selected_sectors) == 1 else "sectors"
+                st.subheader(f"Feasibility analysis for entrepreneurship in the {label}: {', '.join(selected_sectors)}")
+                st.markdown(f"**Location: {city}, {country}**")
+                placeholder = st.empty()
+                with placeholder:
+                    data = st.write_stream(generate_feasibility_analysis(city, country, selected_sectors, contexts, ANALYSIS_LENGTHS[length])).strip()
 
-                information[selected_sector] = data
-                all_sources.extend(sources)
+                # Replace the streamed text with the analysis minus its chart data block
+                analysis, chart_data = parse_chart_data(data, selected_sectors)
+                placeholder.markdown(analysis)
+                information = split_sections(analysis, selected_sectors)
 
-                # Display the information
-                st.subheader(f"Feasibility analysis for entrepreneurship in the sector: {selected_sector}")
-                st.markdown(f"**Location: {city}, {country}**")
-                st.write(data)
-
-                # Extract numerical data and create charts
-                line_data, pie_data = extract_numerical_data(data)
-                charts = create_charts(line_data, pie_data)
-
-                # Display charts
-                for chart in charts:
-                    st.plotly_chart(chart)
-
-                st.write("---")
-
-                # Button to download the document
-                doc = create_docx(city, country, information, all_sources)
-                buffer = BytesIO()
-                doc.save(buffer)
-                buffer.seek(0)
-                st.download_button(
-                    label="Download analysis as DOCX",
-                    data=buffer,
-                    file_name=f"Feasibility_Analysis_{city.replace(' ', '_')}_{country.replace(' ', '_')}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
+                render_results(city, country, information, chart_data, all_sources)
         else:
             st.warning("Please enter a city and country, and select a sector or describe your entrepreneurship idea.")